@@ -3,43 +3,51 @@ A tool for light-duty memoization, intended for use with APIs.
 """
 
 
-import inspect
-import json
+import hashlib
 import logging
+import sqlite3
+import sys
+import time
 
+import orjson
 from appdirs import AppDirs
 
-from datetime import datetime, timezone
 from functools import partial, wraps
 from pathlib import Path
-from typing import Any, Callable, Union
+from typing import Any, Callable, Optional, Union
 
 default_dirs = AppDirs()
 
 DEFAULT_PATH = Path(default_dirs.user_cache_dir)
 
+# Bump whenever the cache table changes shape. Cache files with a different version are cleared when opened.
+SCHEMA_VERSION = 3
+
 
 def cached(func = None, cache_dir: Path = None, max_size: int = 0, max_age: int = 0, force_update:bool = False) -> Callable:
-    if cache_dir is None:
-            frame = inspect.getframeinfo(inspect.currentframe().f_back)
-            cache_dir = Path(default_dirs.user_cache_dir) / Path(frame.filename).stem
     if func is None:
         return partial(cached, cache_dir=cache_dir, max_size=max_size, max_age=max_age, force_update=force_update)
+    if cache_dir is None:
+        # Default to a directory named after the file that defines func
+        module_file = getattr(sys.modules.get(func.__module__), "__file__", None)
+        cache_dir = DEFAULT_PATH / (Path(module_file).stem if module_file else func.__module__)
     @wraps(func)
     def cache_wrapper(*args, **kwargs):
-        cache_file_path = Path(cache_dir) / f"{func.__name__}_cache"
+        cache_file_path = Path(cache_dir) / f"{func.__name__}_cache.sqlite3"
         # Log a warning if a supplied argument does not have a good string representation
         for arg in args:
             warn_if_no_str(arg)
-        for k, v in kwargs:
+        for k, v in kwargs.items():
             warn_if_no_str(k)
             warn_if_no_str(v)
-        call_string = f"{args}, {kwargs}"
+        call_key = make_call_key(args, kwargs)
         with JsonCache(cache_file_path, max_size=max_size, max_age=max_age, force_update=force_update) as cache:
-            if call_string not in cache:
-                cache.store(call_string, func(*args, **kwargs))
-                logging.info("%s cached.", call_string)
-            return cache.retrieve(call_string)
+            if call_key in cache:
+                return cache.retrieve(call_key)
+            # Return the stored copy so a miss gives the same types as a later hit
+            response = cache.store(call_key, func(*args, **kwargs))
+            logging.info("%s%s cached.", func.__name__, args)
+        return response
     return cache_wrapper
 
 
@@ -50,21 +58,30 @@ def warn_if_no_str(item: Any) -> None:
     logging.warning("%s does not have a good string representation. Cache may not behave as expected.")
 
 
+def make_call_key(args: tuple, kwargs: dict) -> str:
+    """
+    Returns a fixed length key identifying a call with the supplied arguments.
+    The key is a digest of the arguments' repr, so it is stable between runs, unlike hash().
+    """
+    call = repr((args, sorted(kwargs.items())))
+    return hashlib.blake2b(call.encode(), digest_size=16).hexdigest()
+
+
 def make_timestamp() -> float:
     """Returns a POSIX UTC timestamp."""
-    return datetime.now(timezone.utc).timestamp()
+    return time.time()
 
 
 class JsonCache:
     """
-    Creates a persistent JSON based cache.
+    Creates a persistent SQLite based cache of JSON serializable responses.
     Intended to be performant relative to a potentially slow API, not relative to built in lru_cache or similar.
-    N.B. Rules for max size and max age are enforced when the file is saved, but the cache object may exceed limits while it is live in memory.
+    N.B. Rules for max size and max age are enforced when the cache is closed, but the cache may exceed limits while it is open.
     """
     
     def __init__(self, cache_file_path:Union[Path] = DEFAULT_PATH, max_size: int = 0, max_age: int = 0, force_update: bool = False) -> None:        
         """
-        Create a persistent JSON cache for a function.
+        Create a persistent SQLite cache for a function.
 
         Keyword Arguments:
          - path: the path to the file in which the chache is to be stored
@@ -76,90 +93,123 @@ class JsonCache:
         self.max_size = max_size
         self.max_age = max_age
         self.force_update = force_update
-        self.cache: dict = {}
+        self.connection: Optional[sqlite3.Connection] = None
+        self._dirty = False
+        # Calls stored or retrieved since the cache was opened. These are never evicted on close.
+        self._touched: set = set()
         
-    def store(self, call: str, response: Any) -> None:
-        """Stores the supplied call and response in the cache."""        
-        self.cache[call] = (response, make_timestamp())
+    def store(self, call: str, response: Any) -> Any:
+        """Stores the supplied call and response in the cache. Returns the response as it will be retrieved from the cache."""
+        now = make_timestamp()
+        # Like json.dump, turn non-str dict keys into strings rather than refusing them
+        value = orjson.dumps(response, option=orjson.OPT_NON_STR_KEYS)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, ts, accessed, prev_accessed) VALUES (?, ?, ?, ?, NULL)",
+            (call, value, now, now),
+        )
+        self._dirty = True
+        self._touched.add(call)
+        return orjson.loads(value)
 
     def retrieve(self, call: str) -> Any:
-        """Returns the response value of the supplied cached call."""
-        return self.cache[call][0]
+        """
+        Returns the response value of the supplied cached call, and marks the call as recently used.
+        Access times are only used for eviction, so they aren't recorded when max_size is 0 and a hit leaves the file untouched.
+        """
+        row = self.connection.execute("SELECT value FROM cache WHERE key = ?", (call,)).fetchone()
+        if row is None:
+            raise KeyError(call)
+        self._touched.add(call)
+        if self.max_size:
+            self.connection.execute("UPDATE cache SET prev_accessed = accessed, accessed = ? WHERE key = ?", (make_timestamp(), call))
+            self._dirty = True
+        return orjson.loads(row[0])
 
     def _purge_expired(self) -> None:
         """Deletes all entries older than max_age"""
         if not self.max_age:
             return
-        old_calls = [call for call in self.cache if self._age_check(call) > self.max_age]
-        for call in old_calls:
-            self.cache.pop(call)
-
-    def _age_check(self, call: str) -> float:
-        """Returns the age in seconds of the supplied call in the cache."""
-        return make_timestamp() - self.cache[call][-1]
+        purged = self.connection.execute("DELETE FROM cache WHERE ts < ?", (make_timestamp() - self.max_age,))
+        if purged.rowcount:
+            self._dirty = True
     
     def _is_current(self, call: str) -> bool:
         """
         Returns True if the supplied call is current in the cache.
-        If force_update is set to True, always returns False. If max_age is 0, always returns True.
+        If force_update is set to True, always returns False. If max_age is 0, any stored call is current.
         """
         if self.force_update:
             return False
-        if not self.max_age:
-            return True
-        return self._age_check(call) < self.max_age
-
-    def _purge_n_oldest(self, count:int = 1) -> None:
-        """Deletes the oldest n entry in the cache."""
-        sorted_entries = sorted(self.cache.items(), key=lambda x: x[-1][-1])
-        # Entries in the cache are stored in the form {call: (response, timestamp)}
-        # so x[-1][-1] grabs the entry's timestamp
-        for entry in sorted_entries[:count]:
-            self.cache.pop(entry[0])
-    
+        cutoff = make_timestamp() - self.max_age if self.max_age else 0
+        row = self.connection.execute("SELECT ts FROM cache WHERE key = ? AND ts > ?", (call, cutoff)).fetchone()
+        return row is not None
+
     def _cull_to_size(self) -> None:
-        """Determines if max_size has been exceeded, and if so deletes the oldest entries until the size of the cache is complient."""
+        """
+        Determines if max_size has been exceeded, and if so deletes entries until the size of the cache is complient.
+        Entries are evicted LRU-2 style, by their second most recent access. Entries that have only been used once go first,
+        so a burst of one-off calls can't push out calls that are made regularly. Calls used since the cache was opened are
+        never evicted, so a new entry always survives the call that stored it and gets the chance to be used again.
+        """
         if not self.max_size:
             return
-        if len(self.cache) > self.max_size:
-            self._purge_n_oldest(len(self.cache) - self.max_size)
-    
-    def write_file(self) -> None:
+        excess = len(self) - self.max_size
+        if excess > 0:
+            protected = tuple(self._touched)
+            placeholders = ", ".join("?" * len(protected))
+            purged = self.connection.execute(
+                f"DELETE FROM cache WHERE key IN (SELECT key FROM cache WHERE key NOT IN ({placeholders}) "
+                "ORDER BY prev_accessed, accessed LIMIT ?)",
+                (*protected, excess),
+            )
+            if purged.rowcount:
+                self._dirty = True
+
+    def open(self) -> None:
+        """Opens a connection to the associated cache file, creating the file and its table if needed."""
         if not self.cache_file_path.parent.exists():
             self.cache_file_path.parent.mkdir(parents=True)
-        with open(self.cache_file_path, "w") as cache_file:
-            json.dump(self.cache, cache_file)
-
-    def read_file(self) -> None:
-        """Opens the associated cache file, and loads the file's contents to the cache dict."""
-        if not self.cache_file_path.exists():
-            self.cache = dict()
-            return
-            #self.cache_file_path.parent.mkdir(parents=True)
-        with open(self.cache_file_path, "r") as cache_file:
-            contents = cache_file.read()
-            if contents:
-                self.cache = json.loads(contents)
-            else:
-                self.cache = dict()
+        self.connection = sqlite3.connect(self.cache_file_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The file was written with an older layout, so its contents can't be trusted. Start over.
+            self.connection.execute("DROP TABLE IF EXISTS cache")
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, value BLOB, ts REAL, accessed REAL, prev_accessed REAL)"
+        )
+        # Indexing ts and access times lets expiry and eviction walk entries in order instead of sorting the whole table
+        self.connection.execute("CREATE INDEX IF NOT EXISTS cache_ts ON cache(ts)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(prev_accessed, accessed)")
+
+    def close(self) -> None:
+        """Commits any changes to the cache file and closes the connection. Skips the commit if nothing has changed."""
+        if self._dirty:
+            self.connection.commit()
+            self._dirty = False
+        self.connection.close()
+        self.connection = None
+        self._touched.clear()
 
     def __contains__(self, item):
-        return item in self.cache and self._is_current(item)
+        return self._is_current(item)
 
     def __len__(self):
-        return len(self.cache)
+        return self.connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
 
     def __repr__(self) -> str:
         return f"<JsonCache Object {hex(id(self))} storing {len(self)} items>"
 
     def __str__(self) -> str:
-        return str(self.cache)
+        rows = self.connection.execute("SELECT key, value FROM cache")
+        return str({call: orjson.loads(value) for call, value in rows})
 
     def __enter__(self):
-        self.read_file()
+        self.open()
         return self
         
     def __exit__(self, *args, **kwargs):
         self._purge_expired()
         self._cull_to_size()
-        self.write_file()
+        self.close()
@@ -0,0 +1,153 @@
+import sqlite3
+
+import pytest
+import json_cache
+
+
+def use_fake_clock(monkeypatch, start: float = 1000.0) -> list:
+    """Replaces make_timestamp with a clock that only moves when told to. Returns the clock as a one item list."""
+    clock = [start]
+    monkeypatch.setattr(json_cache, "make_timestamp", lambda: clock[0])
+    return clock
+
+def test_call_key():
+    key = json_cache.make_call_key((40.8, -73.9, "imperial"), {})
+    assert len(key) == 32
+    assert key == json_cache.make_call_key((40.8, -73.9, "imperial"), {})
+    assert key != json_cache.make_call_key((40.8, -73.9, "metric"), {})
+    assert json_cache.make_call_key((), {"a": 1, "b": 2}) == json_cache.make_call_key((), {"b": 2, "a": 1})
+    # Arguments orjson can't encode, or encodes identically, must still work and stay distinct
+    assert json_cache.make_call_key((2 ** 70,), {})
+    assert json_cache.make_call_key((None,), {}) != json_cache.make_call_key((float("nan"),), {})
+    assert json_cache.make_call_key(((1, 2),), {}) != json_cache.make_call_key(([1, 2],), {})
+    assert json_cache.make_call_key(("1",), {}) != json_cache.make_call_key((1,), {})
+
+def test_store_and_retrieve(tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    with json_cache.JsonCache(cache_path) as cache:
+        cache.store("call", {"temp": 70, "hourly": [1, 2, 3]})
+        assert "call" in cache
+        assert "other call" not in cache
+    with json_cache.JsonCache(cache_path) as cache:
+        assert len(cache) == 1
+        assert cache.retrieve("call") == {"temp": 70, "hourly": [1, 2, 3]}
+        with pytest.raises(KeyError):
+            cache.retrieve("other call")
+
+def test_non_str_keys_are_stored_as_str(tmp_path):
+    with json_cache.JsonCache(tmp_path / "cache.sqlite3") as cache:
+        cache.store("call", {1: "a", None: "b"})
+        assert cache.retrieve("call") == {"1": "a", "null": "b"}
+
+def test_miss_and_hit_return_the_same_value(tmp_path):
+    @json_cache.cached(cache_dir=tmp_path)
+    def lookup(x):
+        return {"coords": (x, x), 1: "a"}
+
+    assert lookup(1) == {"coords": [1, 1], "1": "a"}
+    assert lookup(1) == {"coords": [1, 1], "1": "a"}
+
+def test_max_age(tmp_path, monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    cache_path = tmp_path / "cache.sqlite3"
+    with json_cache.JsonCache(cache_path, max_age=600) as cache:
+        cache.store("old", 1)
+        clock[0] += 500
+        cache.store("new", 2)
+        assert "old" in cache
+        clock[0] += 200
+        assert "old" not in cache
+        assert "new" in cache
+    with json_cache.JsonCache(cache_path, max_age=600) as cache:
+        assert len(cache) == 1
+        assert cache.retrieve("new") == 2
+
+def test_force_update(tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    with json_cache.JsonCache(cache_path) as cache:
+        cache.store("call", 1)
+    with json_cache.JsonCache(cache_path, force_update=True) as cache:
+        assert "call" not in cache
+
+def test_max_size_evicts_oldest(tmp_path, monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    cache_path = tmp_path / "cache.sqlite3"
+    for call in "abcd":
+        clock[0] += 1
+        with json_cache.JsonCache(cache_path, max_size=3) as cache:
+            cache.store(call, call)
+    with json_cache.JsonCache(cache_path, max_size=3) as cache:
+        assert len(cache) == 3
+        assert "a" not in cache
+        assert all(call in cache for call in "bcd")
+
+def test_old_schema_is_replaced(tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    connection = sqlite3.connect(cache_path)
+    connection.execute("CREATE TABLE cache(key TEXT PRIMARY KEY, value BLOB, ts REAL)")
+    connection.execute("INSERT INTO cache VALUES ('call', '1', 0)")
+    connection.commit()
+    connection.close()
+    with json_cache.JsonCache(cache_path) as cache:
+        assert len(cache) == 0
+        cache.store("call", 2)
+    with json_cache.JsonCache(cache_path) as cache:
+        assert cache.retrieve("call") == 2
+
+def test_clean_close_does_not_commit(tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    with json_cache.JsonCache(cache_path, max_age=600) as cache:
+        cache.store("call", 1)
+        assert cache._dirty
+    with json_cache.JsonCache(cache_path, max_age=600) as cache:
+        assert "call" in cache
+        cache._purge_expired()
+        assert not cache._dirty
+    with json_cache.JsonCache(cache_path, max_age=600) as cache:
+        assert cache.retrieve("call") == 1
+
+def test_unbounded_hit_does_not_commit(tmp_path):
+    cache_path = tmp_path / "cache.sqlite3"
+    with json_cache.JsonCache(cache_path, max_age=600) as cache:
+        cache.store("call", 1)
+    with json_cache.JsonCache(cache_path, max_age=600) as cache:
+        assert cache.retrieve("call") == 1
+        assert not cache._dirty
+    with json_cache.JsonCache(cache_path, max_size=10) as cache:
+        assert cache.retrieve("call") == 1
+        assert cache._dirty
+
+def test_new_call_enters_full_cache(tmp_path, monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    calls = []
+
+    @json_cache.cached(cache_dir=tmp_path, max_size=3)
+    def lookup(x):
+        calls.append(x)
+        return x
+
+    for x in "abcabc":
+        clock[0] += 1
+        lookup(x)
+    for _ in range(4):
+        clock[0] += 1
+        assert lookup("d") == "d"
+    assert calls == ["a", "b", "c", "d"]
+
+def test_eviction_prefers_once_used_entries(tmp_path, monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    calls = []
+
+    @json_cache.cached(cache_dir=tmp_path, max_size=2)
+    def lookup(x):
+        calls.append(x)
+        return x
+
+    for timestamp, x in [(100, "home"), (150, "oneoff1"), (200, "home"), (300, "oneoff2")]:
+        clock[0] = timestamp
+        lookup(x)
+    # oneoff1 was used more recently than home's second most recent use, but only once, so it goes first
+    clock[0] = 400
+    lookup("home")
+    lookup("oneoff2")
+    assert calls == ["home", "oneoff1", "oneoff2"]
@@ -1,4 +1,5 @@
 import pytest
+import time
 import weatherpls
 
 def test_get_weather():
@@ -25,6 +26,16 @@ def test_heading():
     assert weatherpls._parse_compass_heading(325) == "NW"
     assert weatherpls._parse_compass_heading(345) == "NNW"
 
+def test_beaufort():
+    assert weatherpls._parse_beaufort_wind_speed(0) == "Calm"
+    assert weatherpls._parse_beaufort_wind_speed(0.9) == "Calm"
+    assert weatherpls._parse_beaufort_wind_speed(1) == "Light air"
+    assert weatherpls._parse_beaufort_wind_speed(12.9) == "Gentle breeze"
+    assert weatherpls._parse_beaufort_wind_speed(13) == "Moderate breeze"
+    assert weatherpls._parse_beaufort_wind_speed(74.9) == "Storm force"
+    assert weatherpls._parse_beaufort_wind_speed(75) == "Hurricane force"
+    assert weatherpls._parse_beaufort_wind_speed(150) == "Hurricane force"
+
 def test_kelvin_conversion():
     assert weatherpls._k_to_f(0) == -459.67
     assert weatherpls._k_to_f(255.372) == 0
@@ -49,4 +60,34 @@ def test_make_ordinal():
     assert weatherpls._make_ordinal(14) == "14th"
     assert weatherpls._make_ordinal(10) == "10th"
     assert weatherpls._make_ordinal(112) == "112th"
-    assert weatherpls._make_ordinal(-5) == "-5th"
\ No newline at end of file
+    assert weatherpls._make_ordinal(-5) == "-5th"
+    assert weatherpls._make_ordinal(-1) == "-1st"
+    assert weatherpls._make_ordinal(-11) == "-11th"
+
+def test_repeat_characters():
+    reports = [
+        {"desc": "Rain", "temp": "50°", "wind": "Calm"},
+        {"desc": "Rain", "temp": "50°", "wind": "Calm"},
+        {"desc": "Rain", "temp": "51°", "wind": "Gale"},
+        {"desc": "Clear", "temp": "51°", "wind": "Gale"},
+    ]
+    reports = weatherpls.WeatherReport._insert_repeat_characters(reports)
+    reports = weatherpls.WeatherReport._enhance_repeat_characters(reports)
+    assert [r["desc"] for r in reports] == ["Rain", "╎", "↓", "Clear"]
+    assert [r["temp"] for r in reports] == ["50°", "50°", "51°", "51°"]
+    assert [r["wind"] for r in reports] == ["Calm", "↓", "Gale", "↓"]
+
+def test_pad_report_strings():
+    reports = [{"a": "x", "b": "long"}, {"a": "xxx", "b": "s"}]
+    padded = weatherpls.WeatherReport._pad_report_strings(reports)
+    assert padded == [{"a": " x ", "b": "long"}, {"a": "xxx", "b": " s  "}]
+
+def test_timestamp_formatting():
+    # mktime interprets the tuple as local time, matching how the formatters read timestamps
+    timestamp = time.mktime((2021, 3, 5, 14, 7, 0, 0, 0, -1))
+    assert weatherpls._get_time_from_timestamp(timestamp) == "2:07"
+    assert weatherpls._get_short_date_from_timestamp(timestamp) == "3/5/21"
+    assert weatherpls._get_long_date_from_timestamp(timestamp) == "Friday, March 5th"
+    midnight = time.mktime((2009, 1, 22, 0, 30, 0, 0, 0, -1))
+    assert weatherpls._get_time_from_timestamp(midnight) == "12:30"
+    assert weatherpls._get_short_date_from_timestamp(midnight) == "1/22/09"
@@ -3,11 +3,14 @@ A weather report CLI. There are many like it, but this one is mine.
 Uses OpenWeatherMap for weather data, and OpenStreetMap for reverse geocoding.
 """
 import argparse
-import datetime
-import json
+import orjson
 import requests
+import time
 
 from appdirs import AppDirs
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 
 from json_cache import cached
 from weatherpls_secrets import OWM_API_KEY
@@ -16,103 +19,96 @@ from weatherpls_config import DEFAULT_LAT, DEFAULT_LONG, DEFAULT_UNITS
 
 dirs = AppDirs(appname="weatherpls")
 
+# A shared session lets back to back API calls reuse pooled connections rather than opening a new one each time
+_SESSION = requests.Session()
+
 def _mps_to_mph(s: float) -> float:
     """Returns the supplied float converted from meters per second to miles per hour."""
     return round(s * 2.237, 2)
 
+_COMPASS_POINTS = (
+    "N", "NNE", "NE", "ENE",
+    "E", "ESE", "SE", "SSE",
+    "S", "SSW", "SW", "WSW",
+    "W", "WNW", "NW", "NNW",
+)
+
 def _parse_compass_heading(heading: float) -> str:
     """Converts a supplied compas headinf float to a string describing direction."""
-    points = {
-        0: "N",
-        1: "NNE",
-        2: "NE",
-        3: "ENE",
-        4: "E",
-        5: "ESE",
-        6: "SE",
-        7: "SSE",
-        8: "S",
-        9: "SSW",
-        10: "SW",
-        11: "WSW",
-        12: "W",
-        13: "WNW",
-        14: "NW",
-        15: "NNW",
-    }
-    return points[int((heading + 11.25) % 360 // 22.5)]
+    return _COMPASS_POINTS[int((heading + 11.25) // 22.5) % 16]
+
+# Minimum wind speeds in mph for each Beaufort description after "Calm"
+_BEAUFORT_MIN_SPEEDS = (1, 4, 8, 13, 19, 25, 32, 39, 47, 55, 64, 75)
+_BEAUFORT_DESCRIPTIONS = (
+    "Calm",
+    "Light air",
+    "Light breeze",
+    "Gentle breeze",
+    "Moderate breeze",
+    "Fresh breeze",
+    "Strong breeze",
+    "Near gale",
+    "Gale",
+    "Strong gale",
+    "Whole gale",
+    "Storm force",
+    "Hurricane force",
+)
 
 def _parse_beaufort_wind_speed(wind_speed: float) -> str:
     """Returns the description associated with the supplied wind speed on the Beaufort scale."""
-    wind_descriptions = {
-        1: "Light air",
-        4: "Light breeze",
-        8: "Gentle breeze",
-        13: "Moderate breeze",
-        19: "Fresh breeze",
-        25: "Strong breeze",
-        32: "Near gale",
-        39: "Gale",
-        47: "Strong gale",
-        55: "Whole gale",
-        64: "Storm force",
-        75: "Hurricane force",
-    }
-    description = "Calm"
-    for min_speed, desc in wind_descriptions.items():
-        if wind_speed >= min_speed:
-            description = desc
-        else:
-            break
-    return description
+    return _BEAUFORT_DESCRIPTIONS[bisect_right(_BEAUFORT_MIN_SPEEDS, wind_speed)]
+
+# Ordinal suffixes indexed by last digit
+_ORDINAL_SUFFIXES = ("th", "st", "nd", "rd") + ("th",) * 6
 
+@cache
 def _make_ordinal(n: int) -> str:
     """Returns the supplied int as an ordinal number string."""
-    oridnal_suffix = {
-        "1": "st",
-        "2": "nd",
-        "3": "rd",
-    }
-    if str(n)[-1] in oridnal_suffix and not 10 < n % 100 < 14:
-        return str(n) + oridnal_suffix[str(n)[-1]]
-    return str(n) + "th"
+    if 11 <= abs(n) % 100 <= 13:
+        return f"{n}th"
+    return f"{n}{_ORDINAL_SUFFIXES[abs(n) % 10]}"
 
 
 def _get_time_from_timestamp(timestamp:int) -> str:
     """Converts an epoch based timestamp to a 12 hr HH:MM formatted time."""
-    dt = datetime.datetime.fromtimestamp(timestamp)
-    return dt.strftime(f"{dt.hour % 12 or 12}:%M")
+    t = time.localtime(timestamp)
+    return f"{t.tm_hour % 12 or 12}:{t.tm_min:02d}"
 
 def _get_long_date_from_timestamp(timestamp: int) -> str:
     """Returns a long date string from a timestamp."""
-    dt = datetime.date.fromtimestamp(timestamp)
-    return dt.strftime(f"%A, %B {_make_ordinal(dt.day)}")
+    t = time.localtime(timestamp)
+    return time.strftime("%A, %B ", t) + _make_ordinal(t.tm_mday)
 
 def _get_short_date_from_timestamp(timestamp: int) -> str:
     """Returns a short date string from a timestamp."""
-    dt = datetime.date.fromtimestamp(timestamp)
-    return dt.strftime(f"{dt.month}/{dt.day}/%y")
+    t = time.localtime(timestamp)
+    return f"{t.tm_mon}/{t.tm_mday}/{t.tm_year % 100:02d}"
 
 @cached(max_age=600)
 def _get_weather_info_by_coord(lat: float, long: float, units: str, api_key=OWM_API_KEY) -> dict:
     """Requests weather info for the supplied lat long coordinates from the OpenWeatherMap API and returns the response as a JSON object."""
     weather_api_uri = f"https://api.openweathermap.org/data/2.5/onecall?lat={lat}&lon={long}&appid={api_key}&units={units}"
-    raw_response = requests.get(weather_api_uri)
-    return json.loads(raw_response.text)
+    raw_response = _SESSION.get(weather_api_uri)
+    return orjson.loads(raw_response.content)
 
-@cached(max_size=10)
+@cached(max_size=10, max_age=2592000)
 def _osm_reverse_lookup(lat: float, long: float):
     """Uses the OpenStreetMap API to reverse-geocode the supplied lat long coordinates."""
     osm_reverse_api_uri = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={long}&zoom=10&format=jsonv2"
-    osm_response = requests.get(osm_reverse_api_uri)
-    return json.loads(osm_response.text)
+    osm_response = _SESSION.get(osm_reverse_api_uri)
+    return orjson.loads(osm_response.content)
 
 class WeatherReport():
     """A class to parse, contain, and display weather information."""
     
     def __init__(self, lat:float, long:float, units:str=DEFAULT_UNITS) -> None:
-        weather_dict = _get_weather_info_by_coord(lat, long, units)
-        loc_dict = _osm_reverse_lookup(lat, long)
+        # The two API calls are independent, so make them at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            weather_future = executor.submit(_get_weather_info_by_coord, lat, long, units)
+            # Place names are looked up at city level, so rounding lets nearby coordinates share a cached lookup
+            loc_future = executor.submit(_osm_reverse_lookup, round(lat, 2), round(long, 2))
+            weather_dict, loc_dict = weather_future.result(), loc_future.result()
         self.coords = (lat, long)
         self.units = units
         self.loc_name = loc_dict["name"]
@@ -175,29 +171,23 @@ class WeatherReport():
     @staticmethod
     def _insert_repeat_characters(reports: list) -> list:
         """Replaces weather description strings with a repeat character if the condition has not changed from the previous instance."""
+        if not reports:
+            return reports
         skip_keys = {"temp", "humidity"}
-        most_recent: dict = {}
-        for report in reports:
-            if not most_recent:
-                most_recent = {k:v for k, v in report.items()}
-                continue
-            for k, v in report.items():
-                if k in skip_keys:
-                    continue
-                if v == most_recent[k]:
+        # Work one key at a time, comparing each value to the original value in the report before it
+        for k in reports[0].keys() - skip_keys:
+            column = [report[k] for report in reports]
+            for report, previous, current in zip(reports[1:], column, column[1:]):
+                if current == previous:
                     report[k] = "↓"
-                else:
-                    most_recent[k] = v
         return reports
     
     @staticmethod
     def _enhance_repeat_characters(reports: list) -> list:
         """Replaces all but the last repeat character in a series with a different one, indicating continuity."""
-        for i, report in enumerate(reports):
-            if i == len(reports) - 1:
-                break
+        for report, next_report in zip(reports, reports[1:]):
             for k, v in report.items():
-                if v == "↓" and reports[i + 1][k] == "↓":
+                if v == "↓" and next_report[k] == "↓":
                     report[k] = "╎"
         return reports
 
@@ -218,14 +208,11 @@ class WeatherReport():
     def _pad_report_strings(report_list: list) -> list:
         """Adds empty characters to the values in a list of dicts until each value is as long as the longest value for that key."""
         # find max length of each report element
-        max_dict = {k: 0 for k in report_list[0]}
-        for k in max_dict:
-            for report in report_list:
-                max_dict[k] = max(max_dict[k], len(report[k]))
+        widths = {k: max(len(report[k]) for report in report_list) for k in report_list[0]}
         # pad each element to match the longest instance
         for report in report_list:
-            for k, v in report.items():
-                report[k] = str.center(v, max_dict[k])
+            for k, width in widths.items():
+                report[k] = report[k].center(width)
         return report_list
 
     def get_weekly_weather(self) -> str: